@@ -1,31 +1,64 @@
-from flask import Flask, request, render_template_string, Response
+from flask import Flask, request, Response, abort, stream_with_context
 import csv
+import importlib.util
 import io
-from datetime import datetime
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+
+# requests is only needed once someone syncs, so it is imported on first use
+REQUESTS_AVAILABLE = importlib.util.find_spec("requests") is not None
 
 try:
-    import requests
-    REQUESTS_AVAILABLE = True
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
 except ImportError:
-    REQUESTS_AVAILABLE = False
+    COMPRESS_AVAILABLE = False
+
+SYNC_BATCH_SIZE = 500
+SYNC_CONCURRENCY = 4
+
+# one pooled session so repeated syncs reuse the TLS connection
+_HTTP = None
+
+def _http_session():
+    global _HTTP
+    if _HTTP is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _HTTP = session
+    return _HTTP
 
 from config import ensure_config, save_config, CONFIG_PATH
 from database import (
     add_tx,
     list_txs,
+    iter_tx_batches,
     get_tx,
     update_tx,
     delete_tx,
+    clear_txs,
     unsynced_txs,
     mark_synced,
     monthly_summary,
-    get_db,
     init_app,
     DB_PATH,
 )
 from utils import to_cents, cents_to_str
 
 app = Flask(__name__)
+# static assets are cache-busted by the ?v= query string, so browsers may keep them for a year
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 31536000
+app.config["COMPRESS_MIMETYPES"] = ["text/html", "text/css", "application/json", "text/csv"]
+app.config["COMPRESS_LEVEL"] = 6
+app.config["COMPRESS_MIN_SIZE"] = 500
+if COMPRESS_AVAILABLE:
+    Compress(app)
 init_app(app)
 
 BASE_HTML = """
@@ -37,338 +70,7 @@ BASE_HTML = """
     <title>Budge - Personal Finance Tracker</title>
     <script src="https://unpkg.com/htmx.org@1.9.12"></script>
     <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    <style>
-        :root {
-            --primary-color: #2563eb;
-            --primary-hover: #1d4ed8;
-            --secondary-color: #64748b;
-            --success-color: #10b981;
-            --danger-color: #ef4444;
-            --background: #f8fafc;
-            --surface: #ffffff;
-            --text-primary: #1e293b;
-            --text-secondary: #64748b;
-            --border-color: #e2e8f0;
-            --shadow: 0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1);
-        }
-
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-            background-color: var(--background);
-            color: var(--text-primary);
-            line-height: 1.6;
-        }
-
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 1rem;
-        }
-
-        .header {
-            background: var(--surface);
-            box-shadow: var(--shadow);
-            margin-bottom: 2rem;
-            border-radius: 0.75rem;
-            padding: 1.5rem;
-        }
-
-        .header h1 {
-            font-size: 2rem;
-            font-weight: 700;
-            color: var(--primary-color);
-            margin-bottom: 0.5rem;
-        }
-
-        .header p {
-            color: var(--text-secondary);
-            font-size: 0.875rem;
-        }
-
-        .grid {
-            display: grid;
-            gap: 1.5rem;
-            grid-template-columns: 1fr;
-        }
-
-        @media (min-width: 768px) {
-            .grid {
-                grid-template-columns: 2fr 1fr;
-            }
-        }
-
-        @media (min-width: 1024px) {
-            .grid {
-                grid-template-columns: 2fr 1fr 1fr;
-            }
-        }
-
-        .card {
-            background: var(--surface);
-            border-radius: 0.75rem;
-            box-shadow: var(--shadow);
-            overflow: hidden;
-        }
-
-        .card-header {
-            padding: 1.5rem 1.5rem 0;
-            border-bottom: 1px solid var(--border-color);
-            margin-bottom: 1.5rem;
-        }
-
-        .card-header h2 {
-            font-size: 1.25rem;
-            font-weight: 600;
-            color: var(--text-primary);
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-        }
-
-        .card-content {
-            padding: 0 1.5rem 1.5rem;
-        }
-
-        .transactions-table {
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 0.875rem;
-        }
-
-        .transactions-table th,
-        .transactions-table td {
-            padding: 0.75rem 0.5rem;
-            text-align: left;
-            border-bottom: 1px solid var(--border-color);
-        }
-
-        .transactions-table th {
-            background-color: var(--background);
-            font-weight: 600;
-            color: var(--text-secondary);
-            font-size: 0.75rem;
-            text-transform: uppercase;
-            letter-spacing: 0.05em;
-        }
-
-        .transactions-table tr:hover {
-            background-color: var(--background);
-        }
-
-        .amount-positive {
-            color: var(--success-color);
-            font-weight: 600;
-        }
-
-        .amount-negative {
-            color: var(--danger-color);
-            font-weight: 600;
-        }
-
-        .badge {
-            display: inline-flex;
-            align-items: center;
-            padding: 0.25rem 0.75rem;
-            border-radius: 9999px;
-            font-size: 0.75rem;
-            font-weight: 500;
-        }
-
-        .badge-expense {
-            background-color: #fef2f2;
-            color: var(--danger-color);
-        }
-
-        .badge-income {
-            background-color: #f0fdf4;
-            color: var(--success-color);
-        }
-
-        .btn {
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            padding: 0.5rem 1rem;
-            border: none;
-            border-radius: 0.5rem;
-            font-size: 0.875rem;
-            font-weight: 500;
-            cursor: pointer;
-            transition: all 0.2s;
-            text-decoration: none;
-        }
-
-        .btn-primary {
-            background-color: var(--primary-color);
-            color: white;
-        }
-
-        .btn-primary:hover {
-            background-color: var(--primary-hover);
-        }
-
-        .btn-secondary {
-            background-color: var(--secondary-color);
-            color: white;
-        }
-
-        .btn-secondary:hover {
-            background-color: #475569;
-        }
-
-        .btn-danger {
-            background-color: var(--danger-color);
-            color: white;
-        }
-
-        .btn-danger:hover {
-            background-color: #dc2626;
-        }
-
-        .btn-sm {
-            padding: 0.25rem 0.5rem;
-            font-size: 0.75rem;
-        }
-
-        .form-group {
-            margin-bottom: 1rem;
-        }
-
-        .form-label {
-            display: block;
-            font-size: 0.875rem;
-            font-weight: 500;
-            color: var(--text-primary);
-            margin-bottom: 0.5rem;
-        }
-
-        .form-input,
-        .form-select {
-            width: 100%;
-            padding: 0.75rem;
-            border: 1px solid var(--border-color);
-            border-radius: 0.5rem;
-            font-size: 0.875rem;
-            transition: border-color 0.2s, box-shadow 0.2s;
-        }
-
-        .form-input:focus,
-        .form-select:focus {
-            outline: none;
-            border-color: var(--primary-color);
-            box-shadow: 0 0 0 3px rgb(37 99 235 / 0.1);
-        }
-
-        .month-selector {
-            margin-bottom: 1rem;
-        }
-
-        .actions {
-            display: flex;
-            gap: 0.5rem;
-            align-items: center;
-        }
-
-        .budget-table {
-            width: 100%;
-            font-size: 0.875rem;
-        }
-
-        .budget-table th,
-        .budget-table td {
-            padding: 0.75rem 0.5rem;
-            text-align: left;
-            border-bottom: 1px solid var(--border-color);
-        }
-
-        .budget-table th {
-            background-color: var(--background);
-            font-weight: 600;
-            color: var(--text-secondary);
-            font-size: 0.75rem;
-            text-transform: uppercase;
-        }
-
-        .budget-input {
-            width: 100%;
-            padding: 0.5rem;
-            border: 1px solid var(--border-color);
-            border-radius: 0.375rem;
-            font-size: 0.875rem;
-        }
-
-        .budget-remaining {
-            font-weight: 600;
-        }
-
-        .budget-remaining.positive {
-            color: var(--success-color);
-        }
-
-        .budget-remaining.negative {
-            color: var(--danger-color);
-        }
-
-        .toolbar {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 0.5rem;
-            margin-top: 1rem;
-            padding-top: 1rem;
-            border-top: 1px solid var(--border-color);
-        }
-
-        /* Mobile optimizations */
-        @media (max-width: 767px) {
-            .container {
-                padding: 0.5rem;
-            }
-
-            .header {
-                padding: 1rem;
-                margin-bottom: 1rem;
-            }
-
-            .header h1 {
-                font-size: 1.5rem;
-            }
-
-            .card-header,
-            .card-content {
-                padding-left: 1rem;
-                padding-right: 1rem;
-            }
-
-            .transactions-table {
-                font-size: 0.75rem;
-            }
-
-            .transactions-table th,
-            .transactions-table td {
-                padding: 0.5rem 0.25rem;
-            }
-
-            .actions {
-                flex-direction: column;
-                align-items: stretch;
-            }
-
-            .actions .btn {
-                justify-content: center;
-            }
-        }
-
-        .htmx-request {
-            opacity: 0.7;
-            transition: opacity 0.2s;
-        }
-    </style>
+    <link href="{{ url_for('static', filename='budge.css', v=css_version) }}" rel="stylesheet">
 </head>
 <body>
     <div class="container">
@@ -383,64 +85,7 @@ BASE_HTML = """
                     <h2><i class="fas fa-list"></i> Transactions</h2>
                 </div>
                 <div class="card-content">
-                    <div id="transactions-table">
-                        <div class="month-selector">
-                            <input type="month" name="month" value="{{ month }}" 
-                                   class="form-input" 
-                                   hx-get="/txs_partial" 
-                                   hx-target="#transactions-table" 
-                                   hx-swap="outerHTML">
-                        </div>
-                        <div style="overflow-x: auto;">
-                            <table class="transactions-table">
-                                <thead>
-                                    <tr>
-                                        <th>Date</th>
-                                        <th>Amount</th>
-                                        <th>Type</th>
-                                        <th>Category</th>
-                                        <th>Description</th>
-                                        <th>Actions</th>
-                                    </tr>
-                                </thead>
-                                <tbody>
-                                    {% for tx in txs %}
-                                    <tr id="tx-{{ tx.id }}">
-                                        <td>{{ tx.iso_date }}</td>
-                                        <td class="{% if tx.type == 'income' %}amount-positive{% else %}amount-negative{% endif %}">
-                                            {% if tx.type == 'income' %}+{% else %}-{% endif %}${{ cents_to_str(tx.amount_cents) }}
-                                        </td>
-                                        <td>
-                                            <span class="badge badge-{{ tx.type }}">
-                                                {% if tx.type == 'income' %}<i class="fas fa-arrow-up"></i>{% else %}<i class="fas fa-arrow-down"></i>{% endif %}
-                                                {{ tx.type.title() }}
-                                            </span>
-                                        </td>
-                                        <td>{{ tx.category }}</td>
-                                        <td>{{ tx.description }}</td>
-                                        <td>
-                                            <div class="actions">
-                                                <button class="btn btn-sm btn-secondary" 
-                                                        hx-get="/edit_form/{{ tx.id }}" 
-                                                        hx-target="#tx-{{ tx.id }}" 
-                                                        hx-swap="outerHTML">
-                                                    <i class="fas fa-edit"></i> Edit
-                                                </button>
-                                                <button class="btn btn-sm btn-danger" 
-                                                        hx-delete="/delete/{{ tx.id }}" 
-                                                        hx-target="#tx-{{ tx.id }}" 
-                                                        hx-swap="outerHTML"
-                                                        hx-confirm="Are you sure you want to delete this transaction?">
-                                                    <i class="fas fa-trash"></i> Delete
-                                                </button>
-                                            </div>
-                                        </td>
-                                    </tr>
-                                    {% endfor %}
-                                </tbody>
-                            </table>
-                        </div>
-                    </div>
+                    <!--TXS_TABLE-->
                 </div>
             </div>
 
@@ -449,44 +94,7 @@ BASE_HTML = """
                     <h2><i class="fas fa-chart-pie"></i> Budgets</h2>
                 </div>
                 <div class="card-content">
-                    <div id="budgets-table">
-                        <form hx-post="/save_budgets" hx-target="#budgets-table" hx-swap="outerHTML">
-                            <table class="budget-table">
-                                <thead>
-                                    <tr>
-                                        <th>Category</th>
-                                        <th>Budget</th>
-                                        <th>Actual</th>
-                                        <th>Remaining</th>
-                                    </tr>
-                                </thead>
-                                <tbody>
-                                    {% for cat in categories %}
-                                    <tr>
-                                        <td>{{ cat }}</td>
-                                        <td>
-                                            <input type="text" name="{{ cat }}" 
-                                                   class="budget-input" 
-                                                   value="{{ cents_to_str(budgets.get(cat, 0)) }}" 
-                                                   placeholder="0.00">
-                                        </td>
-                                        <td class="{% if summary.get(cat, 0) > 0 %}amount-negative{% endif %}">
-                                            ${{ cents_to_str(summary.get(cat, 0)) }}
-                                        </td>
-                                        <td class="budget-remaining {% if (budgets.get(cat, 0) - summary.get(cat, 0)) >= 0 %}positive{% else %}negative{% endif %}">
-                                            ${{ cents_to_str(budgets.get(cat, 0) - summary.get(cat, 0)) }}
-                                        </td>
-                                    </tr>
-                                    {% endfor %}
-                                </tbody>
-                            </table>
-                            <div style="margin-top: 1rem;">
-                                <button type="submit" class="btn btn-primary">
-                                    <i class="fas fa-save"></i> Save Budgets
-                                </button>
-                            </div>
-                        </form>
-                    </div>
+                    <!--BUDGETS_TABLE-->
                 </div>
             </div>
 
@@ -552,284 +160,261 @@ BASE_HTML = """
 
 TXS_PARTIAL = """
 <div id="transactions-table">
-    <div class="month-selector">
-        <input type="month" name="month" value="{{ month }}" 
-               class="form-input" 
-               hx-get="/txs_partial" 
-               hx-target="#transactions-table" 
-               hx-swap="outerHTML">
-    </div>
-    <div style="overflow-x: auto;">
-        <table class="transactions-table">
-            <thead>
-                <tr>
-                    <th>Date</th>
-                    <th>Amount</th>
-                    <th>Type</th>
-                    <th>Category</th>
-                    <th>Description</th>
-                    <th>Actions</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for tx in txs %}
-                <tr id="tx-{{ tx.id }}">
-                    <td>{{ tx.iso_date }}</td>
-                    <td class="{% if tx.type == 'income' %}amount-positive{% else %}amount-negative{% endif %}">
-                        {% if tx.type == 'income' %}+{% else %}-{% endif %}${{ cents_to_str(tx.amount_cents) }}
-                    </td>
-                    <td>
-                        <span class="badge badge-{{ tx.type }}">
-                            {% if tx.type == 'income' %}<i class="fas fa-arrow-up"></i>{% else %}<i class="fas fa-arrow-down"></i>{% endif %}
-                            {{ tx.type.title() }}
-                        </span>
-                    </td>
-                    <td>{{ tx.category }}</td>
-                    <td>{{ tx.description }}</td>
-                    <td>
-                        <div class="actions">
-                            <button class="btn btn-sm btn-secondary" 
-                                    hx-get="/edit_form/{{ tx.id }}" 
-                                    hx-target="#tx-{{ tx.id }}" 
-                                    hx-swap="outerHTML">
-                                <i class="fas fa-edit"></i> Edit
-                            </button>
-                            <button class="btn btn-sm btn-danger" 
-                                    hx-delete="/delete/{{ tx.id }}" 
-                                    hx-target="#tx-{{ tx.id }}" 
-                                    hx-swap="outerHTML"
-                                    hx-confirm="Are you sure you want to delete this transaction?">
-                                <i class="fas fa-trash"></i> Delete
-                            </button>
-                        </div>
-                    </td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-    </div>
+    {% include "_txs_table.html" %}
 </div>
 """
 
 BUDGETS_PARTIAL = """
 <div id="budgets-table">
-    <form hx-post="/save_budgets" hx-target="#budgets-table" hx-swap="outerHTML">
-        <table class="budget-table">
-            <thead>
-                <tr>
-                    <th>Category</th>
-                    <th>Budget</th>
-                    <th>Actual</th>
-                    <th>Remaining</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for cat in categories %}
-                <tr>
-                    <td>{{ cat }}</td>
-                    <td>
-                        <input type="text" name="{{ cat }}" 
-                               class="budget-input" 
-                               value="{{ cents_to_str(budgets.get(cat, 0)) }}" 
-                               placeholder="0.00">
-                    </td>
-                    <td class="{% if summary.get(cat, 0) > 0 %}amount-negative{% endif %}">
-                        ${{ cents_to_str(summary.get(cat, 0)) }}
-                    </td>
-                    <td class="budget-remaining {% if (budgets.get(cat, 0) - summary.get(cat, 0)) >= 0 %}positive{% else %}negative{% endif %}">
-                        ${{ cents_to_str(budgets.get(cat, 0) - summary.get(cat, 0)) }}
-                    </td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-        <div style="margin-top: 1rem;">
-            <button type="submit" class="btn btn-primary">
-                <i class="fas fa-save"></i> Save Budgets
-            </button>
-        </div>
-    </form>
+    {% include "_budgets_table.html" %}
 </div>
 """
 
 EDIT_FORM_PARTIAL = """
-<tr id="tx-{{ tx.id }}" style="background-color: var(--background);">
-    <td colspan="6">
-        <form hx-post="/edit/{{ tx.id }}" hx-target="#transactions-table" hx-swap="outerHTML" 
-              style="display: grid; grid-template-columns: repeat(auto-fit, minmax(120px, 1fr)); gap: 0.5rem; padding: 1rem;">
-            <div class="form-group" style="margin-bottom: 0;">
-                <label class="form-label" style="font-size: 0.75rem;">Date</label>
-                <input type="date" name="date" value="{{ tx.iso_date }}" class="form-input" style="padding: 0.5rem;">
-            </div>
-            <div class="form-group" style="margin-bottom: 0;">
-                <label class="form-label" style="font-size: 0.75rem;">Amount</label>
-                <input type="text" name="amount" value="{{ cents_to_str(tx.amount_cents) }}" class="form-input" style="padding: 0.5rem;">
-            </div>
-            <div class="form-group" style="margin-bottom: 0;">
-                <label class="form-label" style="font-size: 0.75rem;">Type</label>
-                <select name="type" class="form-select" style="padding: 0.5rem;">
-                    <option value="expense" {% if tx.type == 'expense' %}selected{% endif %}>Expense</option>
-                    <option value="income" {% if tx.type == 'income' %}selected{% endif %}>Income</option>
-                </select>
-            </div>
-            <div class="form-group" style="margin-bottom: 0;">
-                <label class="form-label" style="font-size: 0.75rem;">Category</label>
-                <select name="category" class="form-select" style="padding: 0.5rem;">
-                    {% for cat in categories %}
-                    <option value="{{ cat }}" {% if tx.category == cat %}selected{% endif %}>{{ cat }}</option>
-                    {% endfor %}
-                </select>
-            </div>
-            <div class="form-group" style="margin-bottom: 0;">
-                <label class="form-label" style="font-size: 0.75rem;">Description</label>
-                <input type="text" name="description" value="{{ tx.description }}" class="form-input" style="padding: 0.5rem;">
-            </div>
-            <div class="form-group" style="margin-bottom: 0; display: flex; align-items: end; gap: 0.5rem;">
-                <button type="submit" class="btn btn-primary btn-sm">
-                    <i class="fas fa-save"></i> Save
-                </button>
-                <button type="button" class="btn btn-secondary btn-sm" 
-                        hx-get="/txs_partial" hx-target="#transactions-table" hx-swap="outerHTML">
-                    <i class="fas fa-times"></i> Cancel
-                </button>
-            </div>
-        </form>
-    </td>
-</tr>
+{% include "_edit_row.html" %}
 """
 
+# small pool for independent queries; each worker thread keeps its own DB connection
+_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="budge-db")
+
+def _current_month():
+    d = datetime.now()
+    return f"{d.year:04d}-{d.month:02d}"
+
+# per-type presentation, resolved by dict lookup so the row template never branches
+_TYPE_FRAGMENTS = {
+    "income": {
+        "cls": "amount-positive",
+        "sign": "+",
+        "icon": "fa-arrow-up",
+        "badge_cls": "badge-income",
+        "label": "Income",
+    },
+    "expense": {
+        "cls": "amount-negative",
+        "sign": "-",
+        "icon": "fa-arrow-down",
+        "badge_cls": "badge-expense",
+        "label": "Expense",
+    },
+}
+
+def _requested_month():
+    month = request.args.get("month")
+    if not month:
+        return _current_month()
+    try:
+        datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        abort(400)
+    return month
+
+def _tx_fields(form):
+    # validated (iso_date, amount_cents, type, category, description) for add_tx/update_tx
+    if form["type"] not in _TYPE_FRAGMENTS or form["category"] not in ensure_config()["_categories_set"]:
+        abort(400)
+    try:
+        iso_date = date.fromisoformat(form["date"]).isoformat()
+        amount_cents = to_cents(form["amount"])
+    except ValueError:
+        abort(400)
+    return iso_date, amount_cents, form["type"], form["category"], form["description"]
+
+def _tx_view(tx):
+    frag = _TYPE_FRAGMENTS.get(tx["type"])
+    if frag is None:
+        # types stored before validation existed (or via add_txs) render with expense
+        # styling and their own label, as the pre-fragment template did
+        ttype = str(tx["type"])
+        frag = {**_TYPE_FRAGMENTS["expense"], "badge_cls": f"badge-{ttype}", "label": ttype.title()}
+    return {**tx, "frag": frag, "amount_str": cents_to_str(tx["amount_cents"])}
+
+# compile the templates once at import; handlers only pay for rendering
+app.jinja_env.globals["cents_to_str"] = cents_to_str
+app.jinja_env.globals["css_version"] = int(os.path.getmtime(os.path.join(app.static_folder, "budge.css")))
+_TXS_TPL = app.jinja_env.from_string(TXS_PARTIAL)
+_BUDGETS_TPL = app.jinja_env.from_string(BUDGETS_PARTIAL)
+_EDIT_FORM_TPL = app.jinja_env.from_string(EDIT_FORM_PARTIAL)
+
+# the index page is a frozen shell around three dynamic pieces: the head and the
+# middle are rendered/encoded once here, only the tables and the add form per request
+_head_src, _rest = BASE_HTML.split("<!--TXS_TABLE-->")
+_mid_src, _tail_src = _rest.split("<!--BUDGETS_TABLE-->")
+with app.test_request_context():
+    _INDEX_HEAD = app.jinja_env.from_string(_head_src).render().encode()
+_INDEX_MID = _mid_src.encode()
+_INDEX_TAIL_TPL = app.jinja_env.from_string(_tail_src)
+
+@app.after_request
+def no_store_dynamic(response):
+    # pages and partials reflect live data; only /static is cacheable
+    if request.endpoint != "static":
+        response.headers.setdefault("Cache-Control", "no-store")
+    return response
+
 @app.route("/")
 def index():
     cfg = ensure_config()
-    month = request.args.get("month") or datetime.now().strftime("%Y-%m")
-    txs = list_txs(month_prefix=month)
-    summary = monthly_summary(month_prefix=month)
-    return render_template_string(
-        BASE_HTML,
-        txs=txs,
-        month=month,
-        categories=cfg["categories"],
-        budgets=cfg.get("budgets", {}),
-        summary=summary,
-        cents_to_str=cents_to_str,
-    )
+    month = _requested_month()
+    # WAL readers don't block each other, so the summary runs alongside the list query
+    f_summary = _POOL.submit(monthly_summary, month_prefix=month)
+    txs = [_tx_view(tx) for tx in list_txs(month_prefix=month)]
+    summary = f_summary.result()
+    chunks = [
+        _INDEX_HEAD,
+        _TXS_TPL.render(txs=txs, month=month).encode(),
+        _INDEX_MID,
+        _BUDGETS_TPL.render(categories=cfg["categories"], budgets=cfg.get("budgets", {}), summary=summary).encode(),
+        _INDEX_TAIL_TPL.render(month=month, categories=cfg["categories"]).encode(),
+    ]
+    return Response(chunks, mimetype="text/html")
 
 @app.route("/txs_partial")
 def txs_partial():
-    month = request.args.get("month") or datetime.now().strftime("%Y-%m")
-    txs = list_txs(month_prefix=month)
-    return render_template_string(TXS_PARTIAL, txs=txs, month=month, cents_to_str=cents_to_str)
+    month = _requested_month()
+    txs = [_tx_view(tx) for tx in list_txs(month_prefix=month)]
+    return _TXS_TPL.render(txs=txs, month=month)
 
 @app.route("/add", methods=["POST"])
 def add():
-    form = request.form
-    add_tx(
-        form["date"],
-        to_cents(form["amount"]),
-        form["type"],
-        form["category"],
-        form["description"],
-    )
+    add_tx(*_tx_fields(request.form))
     return txs_partial()
 
 @app.route("/delete/<int:txid>", methods=["DELETE"])
 def delete(txid):
     delete_tx(txid)
+    # must stay a 200: htmx 1.x skips the swap on 204, which would leave the row on screen
     return ""
 
 @app.route("/edit_form/<int:txid>")
 def edit_form(txid):
     tx = get_tx(txid)
     cfg = ensure_config()
-    return render_template_string(EDIT_FORM_PARTIAL, tx=tx, categories=cfg["categories"], cents_to_str=cents_to_str)
+    return _EDIT_FORM_TPL.render(tx=tx, categories=cfg["categories"])
 
 @app.route("/edit/<int:txid>", methods=["POST"])
 def edit(txid):
-    form = request.form
-    update_tx(
-        txid,
-        form["date"],
-        to_cents(form["amount"]),
-        form["type"],
-        form["category"],
-        form["description"],
-    )
+    update_tx(txid, *_tx_fields(request.form))
     return txs_partial()
 
 @app.route("/save_budgets", methods=["POST"])
 def save_budgets():
     cfg = ensure_config()
-    budgets = {}
-    for cat in cfg["categories"]:
-        if cat in request.form:
-            budgets[cat] = to_cents(request.form[cat])
-    cfg["budgets"] = budgets
-    save_config(cfg)
-    summary = monthly_summary(month_prefix=datetime.now().strftime("%Y-%m"))
-    return render_template_string(
-        BUDGETS_PARTIAL,
-        categories=cfg["categories"],
-        budgets=cfg["budgets"],
+    form = request.form
+    try:
+        budgets = {cat: to_cents(form[cat]) for cat in cfg["categories"] if cat in form and form[cat].strip()}
+    except ValueError:
+        abort(400)
+    # no-op submits leave config.json untouched; otherwise save a copy so the
+    # cached config other threads read only changes once the write succeeds
+    new_cfg = cfg
+    if budgets != cfg.get("budgets"):
+        new_cfg = {**cfg, "budgets": budgets}
+        save_config(new_cfg)
+    summary = monthly_summary(month_prefix=_current_month())
+    return _BUDGETS_TPL.render(
+        categories=new_cfg["categories"],
+        budgets=new_cfg["budgets"],
         summary=summary,
-        cents_to_str=cents_to_str,
     )
 
 @app.route("/export")
 def export_csv():
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Date", "Amount", "Type", "Category", "Description"])
-    
-    txs = list_txs()
-    for tx in txs:
-        writer.writerow([
-            tx["iso_date"],
-            cents_to_str(tx["amount_cents"]),
-            tx["type"],
-            tx["category"],
-            tx["description"]
-        ])
-    
-    output.seek(0)
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["Date", "Amount", "Type", "Category", "Description"])
+        yield buf.getvalue()
+
+        for rows in iter_tx_batches():
+            buf.seek(0)
+            buf.truncate(0)
+            # columns arrive in CSV order, so index positionally and only reformat the amount
+            writer.writerows((r[0], cents_to_str(r[1]), r[2], r[3], r[4]) for r in rows)
+            yield buf.getvalue()
+
     return Response(
-        output.getvalue(),
+        stream_with_context(generate()),
         mimetype="text/csv",
         headers={"Content-Disposition": "attachment; filename=transactions.csv"}
     )
 
+def _patch_chunk(firebase_url, chunk):
+    # one multi-location PATCH per chunk, keyed by id so a retried chunk overwrites
+    # rather than duplicates. unsynced_txs() selects id followed by exactly the
+    # payload columns, so each record is the remaining row zipped with their names.
+    fields = chunk[0].keys()[1:]
+    body = {str(tx[0]): dict(zip(fields, tx[1:])) for tx in chunk}
+    response = _http_session().patch(firebase_url, json=body, timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    return [tx[0] for tx in chunk]
+
+def _push_unsynced(firebase_url):
+    unsynced = unsynced_txs()
+    if not unsynced:
+        return True, "Nothing to sync"
+
+    # create the session before fanning out so the pool threads share one
+    _http_session()
+    chunks = [unsynced[i:i + SYNC_BATCH_SIZE] for i in range(0, len(unsynced), SYNC_BATCH_SIZE)]
+    synced = 0
+    errors = []
+    # chunks are independent, so overlap their round trips on the shared session
+    with ThreadPoolExecutor(max_workers=SYNC_CONCURRENCY, thread_name_prefix="budge-sync-http") as pool:
+        futures = [pool.submit(_patch_chunk, firebase_url, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            try:
+                ids = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            # mark each chunk as it lands so a failed one doesn't resend the rest
+            mark_synced(ids)
+            synced += len(ids)
+    if errors:
+        return False, f"Synced {synced} of {len(unsynced)} transactions; {len(errors)} chunk(s) failed: {errors[0]}"
+    return True, "Synced"
+
+def _sync_worker():
+    while True:
+        _SYNC_Q.get()
+        with app.app_context():
+            try:
+                firebase_url = ensure_config().get("firebase_url")
+                if firebase_url:
+                    ok, message = _push_unsynced(firebase_url)
+                    # failures must survive the WARNING level used in production
+                    (app.logger.info if ok else app.logger.warning)("Sync: %s", message)
+            except Exception:
+                app.logger.exception("Sync worker failed")
+
+# at most one pending sync; repeated clicks while one is queued coalesce into it
+_SYNC_Q = queue.Queue(maxsize=1)
+threading.Thread(target=_sync_worker, name="budge-sync", daemon=True).start()
+
 @app.route("/sync")
 def sync():
     cfg = ensure_config()
     firebase_url = cfg.get("firebase_url")
     if not firebase_url or not REQUESTS_AVAILABLE:
         return "Sync not configured or requests unavailable"
-    
-    unsynced = unsynced_txs()
-    if unsynced:
-        try:
-            response = requests.post(firebase_url, json=unsynced)
-            if response.status_code == 200:
-                mark_synced([tx["id"] for tx in unsynced])
-                return "Synced"
-            else:
-                return f"Sync failed: {response.status_code}"
-        except Exception as e:
-            return f"Sync error: {e}"
-    return "Nothing to sync"
+
+    try:
+        _SYNC_Q.put_nowait(True)
+    except queue.Full:
+        pass
+    return "Sync queued", 202
 
 @app.route("/clear_all", methods=["POST"])
 def clear_all():
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM transactions")
-    conn.commit()
+    clear_txs()
     return txs_partial()
 
 if __name__ == "__main__":
     ensure_config()
     print("Starting Budge (Flask + HTMX). DB:", DB_PATH, "Config:", CONFIG_PATH)
     
-    import os
     port = int(os.environ.get("PORT", 8000))
     debug = os.environ.get("FLASK_ENV") != "production"
     
@@ -1,11 +1,29 @@
 import os
 import json
+import stat
+import tempfile
 
 APP_DIR = os.path.dirname(os.path.realpath(__file__))
 CONFIG_PATH = os.path.join(APP_DIR, "config.json")
 
+# (stamp, cfg): parsed config keyed by the file's (mtime, size); reloaded only when
+# the file changes. Always replaced as one tuple so threads never see a half update.
+_CFG_CACHE = (None, None)
+
+def _stamp():
+    st = os.stat(CONFIG_PATH)
+    return (st.st_mtime_ns, st.st_size)
+
+def _with_derived(cfg):
+    # derived, non-persisted keys start with "_" and are stripped by save_config
+    cfg["_categories_set"] = frozenset(cfg["categories"])
+    return cfg
+
 def ensure_config():
-    if not os.path.exists(CONFIG_PATH):
+    global _CFG_CACHE
+    try:
+        stamp = _stamp()
+    except FileNotFoundError:
         cfg = {
             "categories": [
                 "Groceries",
@@ -19,12 +37,35 @@ def ensure_config():
             "budgets": {},
             "firebase_url": ""
         }
-        with open(CONFIG_PATH, "w") as f:
-            json.dump(cfg, f, indent=2)
+        save_config(cfg)
         return cfg
+    cached_stamp, cached_cfg = _CFG_CACHE
+    if stamp == cached_stamp:
+        return cached_cfg
     with open(CONFIG_PATH) as f:
-        return json.load(f)
+        cfg = _with_derived(json.load(f))
+    _CFG_CACHE = (stamp, cfg)
+    return cfg
 
 def save_config(cfg):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(cfg, f, indent=2)
+    global _CFG_CACHE
+    # write a sibling temp file and rename it over config.json, so a concurrent
+    # ensure_config() reads either the old or the new file, never a truncated one
+    try:
+        # mkstemp creates 0600; keep whatever mode config.json already has
+        mode = stat.S_IMODE(os.stat(CONFIG_PATH).st_mode)
+    except FileNotFoundError:
+        # first save: use the mode a plain open() would have created
+        mask = os.umask(0)
+        os.umask(mask)
+        mode = 0o666 & ~mask
+    fd, tmp_path = tempfile.mkstemp(dir=APP_DIR, prefix=".config-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            os.fchmod(f.fileno(), mode)
+            json.dump({k: v for k, v in cfg.items() if not k.startswith("_")}, f, indent=2)
+        os.replace(tmp_path, CONFIG_PATH)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    _CFG_CACHE = (_stamp(), _with_derived(cfg))
@@ -1,19 +1,53 @@
 import sqlite3
 import os
-from flask import g
+import json
+import threading
+from contextlib import contextmanager
 
 APP_DIR = os.path.dirname(os.path.realpath(__file__))
 DB_PATH = os.path.join(APP_DIR, "budget.db")
+# bump when init_db gains tables/indexes; existing DBs re-run the idempotent init once
+SCHEMA_VERSION = 1
+
+# fixed statement text so sqlite3's per-connection statement cache always hits
+SQL_INSERT_TX = "INSERT INTO transactions (iso_date, amount_cents, type, category, description, created_at) VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)"
+SQL_UPDATE_TX = "UPDATE transactions SET iso_date = ?, amount_cents = ?, type = ?, category = ?, description = ? WHERE id = ?"
+SQL_DELETE_TX = "DELETE FROM transactions WHERE id = ?"
+SQL_MARK_SYNCED = "UPDATE transactions SET synced = 1 WHERE id IN (SELECT value FROM json_each(?))"
+# the page only shows these columns; created_at/synced are never fetched for display
+TX_VIEW_COLUMNS = "id, iso_date, amount_cents, type, category, description"
+SQL_GET_TX = f"SELECT {TX_VIEW_COLUMNS} FROM transactions WHERE id = ?"
+SQL_LIST_TX = f"SELECT {TX_VIEW_COLUMNS} FROM transactions ORDER BY iso_date DESC, id DESC LIMIT ?"
+SQL_LIST_TX_MONTH = f"SELECT {TX_VIEW_COLUMNS} FROM transactions WHERE iso_date >= ? AND iso_date < ? ORDER BY iso_date DESC, id DESC LIMIT ?"
+# id first, then exactly the fields pushed to Firebase, in payload order
+SQL_UNSYNCED = "SELECT id, iso_date, amount_cents, type, category, description, created_at FROM transactions WHERE synced = 0"
+SQL_MONTH_SUMMARY = "SELECT category, COALESCE(SUM(amount_cents), 0) FROM transactions WHERE iso_date >= ? AND iso_date < ? AND type = ? GROUP BY category"
+SQL_YEAR_SUMMARY = "SELECT substr(iso_date, 1, 7) AS ym, type, SUM(amount_cents) FROM transactions WHERE iso_date >= ? AND iso_date < ? GROUP BY ym, type"
+SQL_EXPORT_TX = "SELECT iso_date, amount_cents, type, category, description FROM transactions ORDER BY iso_date DESC, id DESC"
+
+# one connection per thread. Long-lived threads without an app context (the
+# index query pool) keep theirs and skip connect + PRAGMA setup on every task;
+# app contexts (requests, sync runs) close theirs in close_db, since the
+# threaded dev server spawns a fresh thread per request anyway
+_tls = threading.local()
 
 def get_db():
-    db = getattr(g, "_db", None)
+    db = getattr(_tls, "conn", None)
     if db is None:
-        db = g._db = sqlite3.connect(DB_PATH)
+        # room for every statement the app issues, so none is evicted and re-prepared
+        db = _tls.conn = sqlite3.connect(DB_PATH, cached_statements=256)
         db.row_factory = sqlite3.Row
-        # if DB is empty, init
-        cur = db.cursor()
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='transactions'")
-        if cur.fetchone() is None:
+        # WAL + NORMAL: one fsync per checkpoint instead of two per commit;
+        # mmap lets reads come straight from the page cache
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA temp_store=MEMORY")
+        db.execute("PRAGMA mmap_size=268435456")
+        db.execute("PRAGMA cache_size=-65536")
+        # wait for a concurrent writer instead of failing with "database is locked"
+        db.execute("PRAGMA busy_timeout=5000")
+        # user_version is a header read, so an up-to-date DB skips all DDL
+        if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
             init_db(db)
     return db
 
@@ -21,7 +55,7 @@ def init_db(conn):
     cur = conn.cursor()
     cur.execute(
         """
-    CREATE TABLE transactions (
+    CREATE TABLE IF NOT EXISTS transactions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         iso_date TEXT NOT NULL,
         amount_cents INTEGER NOT NULL,
@@ -33,72 +67,127 @@ def init_db(conn):
     )
     """
     )
+    # covers the month filter + expense grouping in monthly_summary
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_tx_month_type ON transactions (iso_date, type, category)")
+    # matches list_txs' ORDER BY, so the newest-first listing is an index walk with no sort
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_tx_date ON transactions (iso_date DESC, id DESC)")
+    # partial index: stays as small as the unsynced backlog, however many rows are synced
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_tx_unsynced ON transactions (id) WHERE synced = 0")
+    cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
 
+def _commit(conn):
+    # inside bulk() the block's single COMMIT covers every write
+    if not getattr(_tls, "bulk", False):
+        conn.commit()
+
+@contextmanager
+def bulk():
+    # group writes into one transaction: one COMMIT (and fsync) for the whole block
+    conn = get_db()
+    if getattr(_tls, "bulk", False):
+        # nested block: the outermost bulk() owns the transaction and its COMMIT
+        yield conn
+        return
+    _tls.bulk = True
+    try:
+        with conn:
+            yield conn
+    finally:
+        _tls.bulk = False
+
 def add_tx(iso_date, amount_cents, ttype, category, description):
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO transactions (iso_date, amount_cents, type, category, description, created_at) VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
-        (iso_date, amount_cents, ttype, category, description),
-    )
-    conn.commit()
+    conn.execute(SQL_INSERT_TX, (iso_date, amount_cents, ttype, category, description))
+    _commit(conn)
+
+def add_txs(rows):
+    # rows: iterable of (iso_date, amount_cents, type, category, description), one
+    # transaction; inside an outer bulk() it joins that block's transaction instead
+    with bulk() as conn:
+        conn.executemany(SQL_INSERT_TX, rows)
+
+def _month_bounds(month_prefix):
+    # "YYYY-MM" -> ("YYYY-MM-01", first day of next month); a half-open range is
+    # sargable where LIKE 'YYYY-MM%' is not (LIKE is case-insensitive by default)
+    year, month = (int(part) for part in month_prefix.split("-"))
+    if not 1 <= month <= 12:
+        raise ValueError(f"invalid month: {month_prefix!r}")
+    if month == 12:
+        return f"{year:04d}-12-01", f"{year + 1:04d}-01-01"
+    return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month + 1:02d}-01"
 
 def list_txs(limit=500, month_prefix=None):
     conn = get_db()
-    cur = conn.cursor()
     if month_prefix:
-        cur.execute("SELECT * FROM transactions WHERE iso_date LIKE ? ORDER BY iso_date DESC, id DESC LIMIT ?", (f"{month_prefix}%", limit))
-    else:
-        cur.execute("SELECT * FROM transactions ORDER BY iso_date DESC, id DESC LIMIT ?", (limit,))
-    return cur.fetchall()
+        return conn.execute(SQL_LIST_TX_MONTH, (*_month_bounds(month_prefix), limit)).fetchall()
+    return conn.execute(SQL_LIST_TX, (limit,)).fetchall()
+
+def iter_tx_batches(size=1000):
+    conn = get_db()
+    cur = conn.execute(SQL_EXPORT_TX)
+    cur.arraysize = size
+    # fetchmany windows keep memory flat for exports while amortizing the per-row C->Python hop
+    while True:
+        rows = cur.fetchmany()
+        if not rows:
+            break
+        yield rows
 
 def get_tx(txid):
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM transactions WHERE id = ?", (txid,))
-    return cur.fetchone()
+    return conn.execute(SQL_GET_TX, (txid,)).fetchone()
 
 def update_tx(txid, iso_date, amount_cents, ttype, category, description):
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute(
-        "UPDATE transactions SET iso_date = ?, amount_cents = ?, type = ?, category = ?, description = ? WHERE id = ?",
-        (iso_date, amount_cents, ttype, category, description, txid),
-    )
-    conn.commit()
+    conn.execute(SQL_UPDATE_TX, (iso_date, amount_cents, ttype, category, description, txid))
+    _commit(conn)
 
 def delete_tx(txid):
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM transactions WHERE id = ?", (txid,))
-    conn.commit()
+    conn.execute(SQL_DELETE_TX, (txid,))
+    _commit(conn)
+
+def clear_txs():
+    conn = get_db()
+    # an unqualified DELETE on a table without triggers hits SQLite's truncate
+    # optimization (whole pages freed, no per-row work). sqlite_sequence is left
+    # alone so ids are never reused for records that may already be synced.
+    conn.execute("DELETE FROM transactions")
+    _commit(conn)
 
 def unsynced_txs():
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM transactions WHERE synced = FALSE")
-    return cur.fetchall()
+    return conn.execute(SQL_UNSYNCED).fetchall()
 
 def mark_synced(ids):
+    if not ids:
+        return
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute(f"UPDATE transactions SET synced = TRUE WHERE id IN ({','.join('?' for _ in ids)})", ids)
-    conn.commit()
+    # ids travel as one JSON array parameter: a single cached statement, whatever the
+    # batch size, and no SQLITE_MAX_VARIABLE_NUMBER ceiling
+    conn.execute(SQL_MARK_SYNCED, (json.dumps(list(ids)),))
+    _commit(conn)
 
 def monthly_summary(month_prefix):
     conn = get_db()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT category, SUM(amount_cents) FROM transactions WHERE iso_date LIKE ? AND type = 'expense' GROUP BY category",
-        (f"{month_prefix}%",),
-    )
     # in form of {'Groceries': 500, 'Restaurants': 300, etc.}
-    return {row[0]: row[1] for row in cur.fetchall()}
+    return dict(conn.execute(SQL_MONTH_SUMMARY, (*_month_bounds(month_prefix), "expense")))
+
+def yearly_summary(year):
+    # one grouped range scan instead of twelve monthly_summary-style queries
+    conn = get_db()
+    cur = conn.execute(SQL_YEAR_SUMMARY, (f"{year:04d}-01-01", f"{year + 1:04d}-01-01"))
+    # in form of {'2025-08': {'expense': 2103, 'income': 50000}, ...}
+    summary = {}
+    for ym, ttype, total in cur:
+        summary.setdefault(ym, {})[ttype] = total
+    return summary
 
 def close_db(exception):
-    db = getattr(g, "_db", None)
+    db = getattr(_tls, "conn", None)
     if db is not None:
+        _tls.conn = None
         db.close()
 
 def init_app(app):
@@ -1,25 +1,31 @@
 def to_cents(amount_str: str) -> int:
     """
     Converts a string amount to cents.
-    - Removes commas and dollar signs.
+    - Removes surrounding whitespace, commas and dollar signs.
     - Handles negative amounts.
-    - Expects two decimal places.
+    - Accepts up to two decimal places ("5", "5.5" and "5.50" are all 550).
     """
     if not amount_str:
         return 0
-    # remove commas and dollar signs
-    amount_str = amount_str.replace(",", "").replace("$", "")
+    # remove whitespace, commas and dollar signs
+    amount_str = amount_str.strip().replace(",", "").replace("$", "")
     # handle negative amounts
     multiplier = -1 if amount_str.startswith("-") else 1
     if multiplier == -1:
         amount_str = amount_str[1:]
-    # expect two decimal places
-    if "." not in amount_str:
-        return int(amount_str) * 100 * multiplier
-    dollars, cents = amount_str.split(".")
-    if len(cents) != 2:
-        raise ValueError("Amount must have two decimal places")
-    return (int(dollars) * 100 + int(cents)) * multiplier
+    # pure int parsing, no Decimal/float round-trip
+    dollars, _, cents = amount_str.partition(".")
+    if not dollars and not cents:
+        raise ValueError("Amount must contain at least one digit")
+    if dollars and not dollars.isdigit():
+        raise ValueError("Amount must be a number")
+    if len(cents) > 2 or (cents and not cents.isdigit()):
+        raise ValueError("Amount must have at most two decimal places")
+    return (int(dollars or "0") * 100 + int(cents.ljust(2, "0"))) * multiplier
+
+
+# "00".."99", so the fractional part is a list index rather than a format call
+_FRAC = [f"{i:02d}" for i in range(100)]
 
 
 def cents_to_str(cents: int) -> str:
@@ -28,4 +34,9 @@ def cents_to_str(cents: int) -> str:
     """
     if cents is None:
         return ""
-    return f"{cents / 100:.2f}"
+    # integer divmod: exact for any size and avoids a float round-trip
+    if cents < 0:
+        dollars, rem = divmod(-cents, 100)
+        return f"-{dollars}.{_FRAC[rem]}"
+    dollars, rem = divmod(cents, 100)
+    return f"{dollars}.{_FRAC[rem]}"